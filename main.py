@@ -1,8 +1,21 @@
 import streamlit as st
-from SPARQLWrapper import SPARQLWrapper, JSON
-from rapidfuzz.fuzz import ratio
+import requests
+from rapidfuzz import fuzz, process
 import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import html
+import json
 import re
+import string
+import threading
+import time
+
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
 
 # Must be the very first Streamlit call
 st.set_page_config(page_title="MetaNetX Compound Search", layout="wide")
@@ -12,103 +25,215 @@ query_params = st.query_params
 compound_param = query_params.get("compound")
 view_param = query_params.get("view")
 
+# Common single-character separators in chemical expressions, mapped to one delimiter
+_SEPARATOR_TABLE = str.maketrans({sep: '|' for sep in (
+    '→⟶⇒⇆⇌↔⟷'  # arrows
+    '+＋'  # plus signs
+    '|/\\'  # alternative separators
+    ',;'  # list separators
+    '⟨⟩[]()'  # brackets (split around them)
+)})
+# Single-character equation indicators; "->" is checked separately
+_EQUATION_INDICATOR_CHARS = frozenset('→⟶⇒⇆⇌↔+⟷')
+_COEFFICIENT_RE = re.compile(r'^\d+\s*')
+# Parenthesised phases like "(aq)" are already split off as their own part
+_PHASE_RE = re.compile(r'(?:^|\s+)(?:aq|s|l|g)$')
+
+# Unicode subscripts/superscripts, dashes and quotes mapped to their ASCII forms
+_NORMALIZE_TABLE = str.maketrans({
+    '₀': '0', '₁': '1', '₂': '2', '₃': '3', '₄': '4',
+    '₅': '5', '₆': '6', '₇': '7', '₈': '8', '₉': '9',
+    '⁰': '0', '¹': '1', '²': '2', '³': '3', '⁴': '4',
+    '⁵': '5', '⁶': '6', '⁷': '7', '⁸': '8', '⁹': '9',
+    '⁺': '+', '⁻': '-',
+    '–': '-', '—': '-',  # different dashes
+    '\u2018': "'", '\u2019': "'",  # different quotes
+})
+
+# Characters urllib.parse.quote never escapes
+_URL_ALWAYS_SAFE = string.ascii_letters + string.digits + '_.-~'
+
+_XREF_LINKS = {
+    "CHEBI": "https://www.ebi.ac.uk/chebi/searchId.do?chebiId=CHEBI:{}",
+    "KEGG": "https://www.kegg.jp/dbget-bin/www_bget?cpd:{}",
+    "HMDB": "https://hmdb.ca/metabolites/{}",
+    "PubChem": "https://pubchem.ncbi.nlm.nih.gov/compound/{}",
+    "MetaCyc": "https://metacyc.org/compound?orgid=META&id={}"
+}
+
 # Helper Functions
 def extract_compounds_from_expression(expression):
     """Extract individual compound names from chemical expressions, equations, or pathways"""
-    # Common separators in chemical expressions
-    separators = [
-        '→', '⟶', '->', '⇒', '⇆', '⇌', '↔',  # arrows
-        '+', '＋',  # plus signs
-        '⟷', '↔',  # equilibrium arrows
-        '|', '/', '\\',  # alternative separators
-        ',', ';',  # list separators
-        '⟨', '⟩', '[', ']', '(', ')',  # brackets (split around them)
-    ]
-    
-    # Replace all separators with a common delimiter
-    cleaned_expression = expression
-    for sep in separators:
-        cleaned_expression = cleaned_expression.replace(sep, '|')
+    # Replace all separators with a common delimiter; "->" is the only multi-character one
+    cleaned_expression = expression.replace('->', '|').translate(_SEPARATOR_TABLE)
     
     # Split and clean compounds
     compounds = []
     for part in cleaned_expression.split('|'):
         part = part.strip()
-        if part and len(part) > 0:
+        if part:
             # Remove stoichiometric coefficients (numbers at the beginning)
-            part = re.sub(r'^\d+\s*', '', part)
-            # Remove common prefixes/suffixes that aren't part of compound names
-            part = re.sub(r'\s*(aq|s|l|g)\s*$', '', part)  # phase indicators
+            part = _COEFFICIENT_RE.sub('', part)
+            # Remove phase indicators that aren't part of compound names
+            part = _PHASE_RE.sub('', part)
             part = part.strip()
             if part and len(part) > 1:  # Avoid single characters
                 compounds.append(part)
     
-    # Remove duplicates while preserving order
-    seen = set()
-    unique_compounds = []
+    # Remove duplicates while preserving order, keeping the first spelling of each
+    unique_compounds = {}
     for comp in compounds:
-        if comp.lower() not in seen:
-            seen.add(comp.lower())
-            unique_compounds.append(comp)
+        unique_compounds.setdefault(comp.lower(), comp)
     
-    return unique_compounds
+    return list(unique_compounds.values())
 
+@functools.lru_cache(maxsize=4096)
 def normalize_compound_name(name):
     """Normalize compound names for better database matching"""
-    if not name:
-        return ""
-    
-    # Handle Unicode subscripts and superscripts
-    subscript_map = {'₀': '0', '₁': '1', '₂': '2', '₃': '3', '₄': '4', 
-                     '₅': '5', '₆': '6', '₇': '7', '₈': '8', '₉': '9'}
-    superscript_map = {'⁰': '0', '¹': '1', '²': '2', '³': '3', '⁴': '4', 
-                       '⁵': '5', '⁶': '6', '⁷': '7', '⁸': '8', '⁹': '9',
-                       '⁺': '+', '⁻': '-'}
-    
-    normalized = name
-    for unicode_char, ascii_char in {**subscript_map, **superscript_map}.items():
-        normalized = normalized.replace(unicode_char, ascii_char)
-    
-    # Additional normalizations
-    normalized = normalized.replace('–', '-').replace('—', '-')  # different dashes
-    normalized = normalized.replace(''', "'").replace(''', "'")  # different quotes
-    
-    return normalized.strip()
+    return name.translate(_NORMALIZE_TABLE).strip() if name else ""
 
 def is_likely_equation(text):
     """Check if the input looks like a chemical equation rather than a single compound"""
-    equation_indicators = ['→', '⟶', '->', '⇒', '⇆', '⇌', '↔', '+', '⟷']
-    return any(indicator in text for indicator in equation_indicators)
+    return not _EQUATION_INDICATOR_CHARS.isdisjoint(text) or '->' in text
+
+def _url_quote(text, safe='/'):
+    """urllib.parse.quote, skipped when every character would be left as-is"""
+    if text.isascii() and not text.strip(_URL_ALWAYS_SAFE + safe):
+        return text
+    return urllib.parse.quote(text, safe=safe)
+
+SPARQL_ENDPOINT = "https://rdf.metanetx.org/sparql"
+EXACT_MATCH_LIMIT = 50
+PARTIAL_CANDIDATES_PER_RESULT = 20
+MIN_WORD_START_LENGTH = 3
+# PubChem asks for at most 5 requests/second; browsers also fetch the images themselves
+PUBCHEM_CHECKS_PER_SECOND = 2
+PUBCHEM_CHECK_TIMEOUT = 5
+PUBCHEM_RECHECK_SECONDS = 24 * 3600
+PUBCHEM_RETRY_BACKOFF_SECONDS = 600
+PUBCHEM_MAX_PENDING_CHECKS = 32
+PUBCHEM_MAX_TRACKED_NAMES = 4096
+
+@st.cache_resource
+def _http_sessions():
+    """Per-thread requests.Session holder, kept across reruns so connections stay alive"""
+    return threading.local()
+
+@st.cache_resource
+def _query_executor():
+    """Long-lived worker pool, so each worker's session is reused across searches"""
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="sparql")
+
+def _get_session():
+    sessions = _http_sessions()
+    session = getattr(sessions, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update({
+            "Accept": "application/sparql-results+json",
+            "User-Agent": "metanetx-app/1.0",
+        })
+        sessions.session = session
+    return session
+
+def _run_sparql(query):
+    """POST a query to the endpoint and parse the SPARQL JSON results"""
+    response = _get_session().post(SPARQL_ENDPOINT, data={"query": query}, timeout=30)
+    response.raise_for_status()
+    return _json.loads(response.content)
+
+@st.cache_resource
+def _pubchem_executor():
+    """Single worker, separate from the SPARQL pool, so image checks never delay a search"""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="pubchem")
+
+@st.cache_resource
+def _pubchem_img_state():
+    """Image-check bookkeeping shared across reruns and sessions; both maps are LRU-bounded"""
+    return {
+        "lock": threading.Lock(),
+        "missing": OrderedDict(),  # encoded names PubChem answered 404 for
+        "recheck_after": OrderedDict(),  # encoded name -> earliest time to check it again
+        "pending": set(),
+        "last_request": 0.0,
+    }
+
+def _remember(lru, key, value):
+    lru[key] = value
+    lru.move_to_end(key)
+    while len(lru) > PUBCHEM_MAX_TRACKED_NAMES:
+        lru.popitem(last=False)
+
+def _check_pubchem_img(encoded_name, url):
+    state = _pubchem_img_state()
+    # Only one worker runs checks, so spacing them here enforces the rate limit
+    wait = state["last_request"] + 1 / PUBCHEM_CHECKS_PER_SECOND - time.monotonic()
+    if wait > 0:
+        time.sleep(wait)
+    state["last_request"] = time.monotonic()
+    try:
+        response = _get_session().head(url, headers={"Accept": "image/png"}, allow_redirects=False, timeout=PUBCHEM_CHECK_TIMEOUT)
+        missing = response.status_code == 404
+        delay = PUBCHEM_RECHECK_SECONDS
+    except Exception:
+        # Slow or failing: back off instead of retrying on the next render
+        missing = False
+        delay = PUBCHEM_RETRY_BACKOFF_SECONDS
+    with state["lock"]:
+        state["pending"].discard(encoded_name)
+        if missing:
+            _remember(state["missing"], encoded_name, True)
+        else:
+            _remember(state["recheck_after"], encoded_name, time.monotonic() + delay)
 
 def get_pubchem_img_url(name):
     try:
-        encoded_name = urllib.parse.quote(normalize_compound_name(name))
-        return f"https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/{encoded_name}/PNG"
+        encoded_name = _url_quote(normalize_compound_name(name))
+        url = f"https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/{encoded_name}/PNG"
     except Exception:
         return None
+    state = _pubchem_img_state()
+    with state["lock"]:
+        if encoded_name in state["missing"]:
+            state["missing"].move_to_end(encoded_name)
+            return None
+        due = state["recheck_after"].get(encoded_name, 0.0) <= time.monotonic()
+        # Bound the queue; names skipped now are picked up on a later render
+        if due and encoded_name not in state["pending"] and len(state["pending"]) < PUBCHEM_MAX_PENDING_CHECKS:
+            state["pending"].add(encoded_name)
+            _pubchem_executor().submit(_check_pubchem_img, encoded_name, url)
+    return url
+
+def _sparql_literal(value):
+    """Quote a Python string as a SPARQL string literal (JSON escapes are valid SPARQL)"""
+    return json.dumps(value, ensure_ascii=False)
+
+_XREF_QUERY = """
+PREFIX mnx: <https://rdf.metanetx.org/schema/>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+
+SELECT ?metabolite ?xref
+WHERE {{
+    VALUES ?needle {{ {values} }}
+    ?metabolite a mnx:CHEM .
+    ?metabolite rdfs:comment ?comment .
+    FILTER(LCASE(?comment) = ?needle)
+    ?metabolite mnx:chemXref ?xref
+}}
+"""
+
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=1024)
+def _query_external_refs(normalized_name):
+    """Cached xref lookup; exceptions propagate so failures are never cached"""
+    query = _XREF_QUERY.format(values=_sparql_literal(normalized_name))
+    results = _run_sparql(query)
+    return [r["xref"]["value"] for r in results["results"]["bindings"]]
 
 def get_external_refs(compound_name):
-    normalized_name = normalize_compound_name(compound_name)
-    query = f"""
-    PREFIX mnx: <https://rdf.metanetx.org/schema/>
-    PREFIX owl: <http://www.w3.org/2002/07/owl#>
-    PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-
-    SELECT ?metabolite ?xref
-    WHERE {{
-        ?metabolite a mnx:CHEM .
-        ?metabolite rdfs:comment ?comment .
-        FILTER(LCASE(?comment) = "{normalized_name.lower()}")
-        ?metabolite mnx:chemXref ?xref
-    }}
-    """
-    sparql = SPARQLWrapper("https://rdf.metanetx.org/sparql")
-    sparql.setQuery(query)
-    sparql.setReturnFormat(JSON)
+    # Normalize before hitting the cache so "H2O" and "h2o" share an entry
+    normalized_name = normalize_compound_name(compound_name).lower()
     try:
-        results = sparql.query().convert()
-        return [r["xref"]["value"] for r in results["results"]["bindings"]]
+        return _query_external_refs(normalized_name)
     except Exception as e:
         st.error(f"External references query failed: {e}")
         return []
@@ -117,15 +242,8 @@ def make_clickable_xref(xref):
     if ":" not in xref:
         return xref
     db, identifier = xref.split(":", 1)
-    links = {
-        "CHEBI": f"https://www.ebi.ac.uk/chebi/searchId.do?chebiId=CHEBI:{identifier}",
-        "KEGG": f"https://www.kegg.jp/dbget-bin/www_bget?cpd:{identifier}",
-        "HMDB": f"https://hmdb.ca/metabolites/{identifier}",
-        "PubChem": f"https://pubchem.ncbi.nlm.nih.gov/compound/{identifier}",
-        "MetaCyc": f"https://metacyc.org/compound?orgid=META&id={identifier}"
-    }
-    url = links.get(db)
-    return f"[{xref}]({url})" if url else xref
+    template = _XREF_LINKS.get(db)
+    return f"[{xref}]({template.format(identifier)})" if template else xref
 
 def display_external_refs(compound_name):
     xrefs = get_external_refs(compound_name)
@@ -142,65 +260,131 @@ if compound_param and view_param == "refs":
     st.markdown("[Back to search](/)", unsafe_allow_html=True)
     st.stop()
 
-def run_query(compound_name, use_contains=False):
-    endpoint_url = "https://rdf.metanetx.org/sparql"
-    sparql = SPARQLWrapper(endpoint_url)
-    normalized_name = normalize_compound_name(compound_name)
-    
-    # Escape quotes in the compound name for SPARQL
-    escaped_name = normalized_name.replace('"', '\\"').replace("'", "\\'")
-    
-    filter_clause = (
-        f'FILTER(CONTAINS(LCASE(?comment), "{escaped_name.lower()}"))'
-        if use_contains else
-        f'FILTER(LCASE(?comment) = "{escaped_name.lower()}")'
-    )
-    query = f"""
-    PREFIX mnx: <https://rdf.metanetx.org/schema/>
-    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-
-    SELECT ?metabolite ?label ?comment ?reference ?formula ?charge ?inchi ?inchikey ?smiles
-    WHERE {{
-        ?metabolite a mnx:CHEM .
-        ?metabolite rdfs:label ?label .
-        ?metabolite rdfs:comment ?comment .
-        {filter_clause}
-        ?metabolite mnx:chemRefer ?reference .
-        OPTIONAL {{ ?metabolite mnx:formula  ?formula }}
-        OPTIONAL {{ ?metabolite mnx:charge   ?charge }}
-        OPTIONAL {{ ?metabolite mnx:inchi    ?inchi }}
-        OPTIONAL {{ ?metabolite mnx:inchikey ?inchikey }}
-        OPTIONAL {{ ?metabolite mnx:smiles   ?smiles }}
-    }}
-    """
-    sparql.setQuery(query)
-    sparql.setReturnFormat(JSON)
+# One sub-SELECT per compound, joined with UNION, so each needle gets its own LIMIT
+# rather than sharing one cap with every other compound in the batch
+_COMPOUND_QUERY = """
+PREFIX mnx: <https://rdf.metanetx.org/schema/>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+
+SELECT ?needle ?metabolite ?label ?comment ?reference ?formula ?charge ?inchi ?inchikey ?smiles
+WHERE {{
+{branches}
+}}
+"""
+
+# {value} and {limit} are filled per compound; everything else is fixed per match mode
+_EXACT_BRANCH = """
+    {{
+        SELECT ?needle ?metabolite ?label ?comment ?reference ?formula ?charge ?inchi ?inchikey ?smiles
+        WHERE {{
+            VALUES ?needle {{ {value} }}
+            ?metabolite a mnx:CHEM .
+            ?metabolite rdfs:label ?label .
+            ?metabolite rdfs:comment ?comment .
+            FILTER(LCASE(?comment) = ?needle)
+            ?metabolite mnx:chemRefer ?reference .
+            OPTIONAL {{ ?metabolite mnx:formula  ?formula }}
+            OPTIONAL {{ ?metabolite mnx:charge   ?charge }}
+            OPTIONAL {{ ?metabolite mnx:inchi    ?inchi }}
+            OPTIONAL {{ ?metabolite mnx:inchikey ?inchikey }}
+            OPTIONAL {{ ?metabolite mnx:smiles   ?smiles }}
+        }}
+        LIMIT {limit}
+    }}"""
+
+# Partial matches: needles of MIN_WORD_START_LENGTH+ chars only match at word starts, and shorter
+# comments are likelier to be close matches, so keep those under the LIMIT
+_PARTIAL_BRANCH = """
+    {{
+        SELECT ?needle ?metabolite ?label ?comment ?reference ?formula ?charge ?inchi ?inchikey ?smiles
+        WHERE {{
+            VALUES ?needle {{ {value} }}
+            ?metabolite a mnx:CHEM .
+            ?metabolite rdfs:label ?label .
+            ?metabolite rdfs:comment ?comment .
+            FILTER((STRLEN(?needle) < {min_length} && CONTAINS(LCASE(?comment), ?needle))
+                || STRSTARTS(LCASE(?comment), ?needle)
+                || CONTAINS(LCASE(?comment), CONCAT(" ", ?needle))
+                || CONTAINS(LCASE(?comment), CONCAT("-", ?needle)))
+            ?metabolite mnx:chemRefer ?reference .
+            OPTIONAL {{ ?metabolite mnx:formula  ?formula }}
+            OPTIONAL {{ ?metabolite mnx:charge   ?charge }}
+            OPTIONAL {{ ?metabolite mnx:inchi    ?inchi }}
+            OPTIONAL {{ ?metabolite mnx:inchikey ?inchikey }}
+            OPTIONAL {{ ?metabolite mnx:smiles   ?smiles }}
+        }}
+        ORDER BY STRLEN(?comment)
+        LIMIT {limit}
+    }}"""
+
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=1024)
+def _query_compounds(normalized_names, use_contains, limit):
+    """Cached lookup of one or more compounds in a single request, bucketed by needle"""
+    branch = _PARTIAL_BRANCH if use_contains else _EXACT_BRANCH
+    query = _COMPOUND_QUERY.format(branches="\n    UNION".join(
+        branch.format(value=_sparql_literal(name), limit=limit, min_length=MIN_WORD_START_LENGTH)
+        for name in normalized_names
+    ))
+    results = _run_sparql(query)
+    buckets = {name: [] for name in normalized_names}
+    for r in results.get("results", {}).get("bindings", []):
+        needle = r.get("needle", {}).get("value")
+        if needle in buckets:
+            buckets[needle].append(r)
+    return buckets
+
+def _row_limit(use_contains, partial_limit):
+    """Server-side row cap per compound; partials fetch enough candidates to rank"""
+    return partial_limit * PARTIAL_CANDIDATES_PER_RESULT if use_contains else EXACT_MATCH_LIMIT
+
+def _resolve(future, fallback):
+    """Collect a worker thread's query result on the main thread, where st.error can render"""
     try:
-        results = sparql.query().convert()
-        return results.get("results", {}).get("bindings", [])
+        return future.result()
     except Exception as e:
         st.error(f"SPARQL query failed: {e}")
-        return []
+        return fallback
+
+def score_partials(compound_name, partials, partial_limit=5):
+    """Drop exact hits from partial results and keep the most similar ones"""
+    normalized_input = normalize_compound_name(compound_name).lower()
+    # Normalize each comment once and reuse it for both filtering and scoring
+    normalized = [normalize_compound_name(r.get("comment", {}).get("value", "")).lower() for r in partials]
+    kept = [(r, n) for r, n in zip(partials, normalized) if n != normalized_input]
+    partials = [r for r, _ in kept]
+    choices = [n for _, n in kept]
+    # process.extract scores in C and returns the top-K already sorted by similarity
+    hits = process.extract(normalized_input, choices, scorer=fuzz.ratio, limit=partial_limit, processor=None)
+    return [(sim, partials[idx]) for _, sim, idx in hits]
 
 def fetch_data(compound_name, match_type="Both", partial_limit=5):
-    results = {"exact": [], "partial": []}
+    return fetch_data_batch([compound_name], match_type, partial_limit)[compound_name]
+
+def fetch_data_batch(compound_names, match_type="Both", partial_limit=5):
+    """Fetch exact and partial matches for several compounds, one request per match type"""
+    # Normalize before hitting the cache so "H2O" and "h2o" share an entry
+    normalized_names = tuple(dict.fromkeys(
+        normalize_compound_name(name).lower() for name in compound_names
+    ))
+    if not normalized_names:
+        return {}
+    # Exact and partial queries are independent, so overlap their round trips
+    executor = _query_executor()
+    futures = {}
     if match_type in ["Exact", "Both"]:
-        results["exact"] = run_query(compound_name, use_contains=False)
+        futures["exact"] = executor.submit(_query_compounds, normalized_names, False, _row_limit(False, partial_limit))
     if match_type in ["Partial", "Both"]:
-        partials = run_query(compound_name, use_contains=True)
-        normalized_input = normalize_compound_name(compound_name).lower()
-        partials = [
-            r for r in partials
-            if normalize_compound_name(r.get("comment", {}).get("value", "")).lower() != normalized_input
-        ]
-        scored_partials = []
-        for r in partials:
-            name = r.get("comment", {}).get("value", "")
-            sim = ratio(normalize_compound_name(name).lower(), normalized_input)
-            scored_partials.append((sim, r))
-        scored_partials.sort(reverse=True, key=lambda x: x[0])
-        results["partial"] = scored_partials[:partial_limit]
-    return results
+        futures["partial"] = executor.submit(_query_compounds, normalized_names, True, _row_limit(True, partial_limit))
+    exact = _resolve(futures["exact"], {}) if "exact" in futures else {}
+    partial = _resolve(futures["partial"], {}) if "partial" in futures else {}
+    results_by_compound = {}
+    for compound in compound_names:
+        key = normalize_compound_name(compound).lower()
+        results_by_compound[compound] = {
+            "exact": exact.get(key, []),
+            "partial": score_partials(compound, partial.get(key, []), partial_limit),
+        }
+    return results_by_compound
 
 def display_compound_results(results, compound_name, is_multi_search=False):
     """Display results for a single compound"""
@@ -227,7 +411,7 @@ def display_results_list(results_list, show_similarity=False):
         comment = r.get('comment', {}).get('value', 'N/A')
         
         try:
-            encoded_comment = urllib.parse.quote(comment, safe='')
+            encoded_comment = _url_quote(comment, safe='')
         except:
             encoded_comment = comment
             
@@ -257,11 +441,14 @@ def display_results_list(results_list, show_similarity=False):
         with col2:
             img_url = get_pubchem_img_url(comment)
             if img_url:
-                try:
-                    st.image(img_url, width=150)
-                    st.markdown(f"[Image source: PubChem]({img_url})")
-                except:
-                    st.markdown("Image not available")
+                # Let the browser fetch images lazily and in parallel instead of blocking the render
+                st.markdown(
+                    f'<img src="{html.escape(img_url)}" width="150" loading="lazy" referrerpolicy="no-referrer">',
+                    unsafe_allow_html=True,
+                )
+                st.markdown(f"[Image source: PubChem]({img_url})")
+            else:
+                st.markdown("Image not available")
 
 # Interface
 st.title("MetaNetX Compound Explorer")
@@ -284,13 +471,14 @@ if st.button("Search"):
             if compounds:
                 st.markdown(f"**Extracted compounds:** {', '.join(compounds)}")
                 
-                # Search each compound
+                # Search all compounds in a single batched request
+                compounds = [compound for compound in compounds if len(compound) > 1]  # Skip very short strings
+                results_by_compound = fetch_data_batch(compounds, match_type, partial_limit)
                 for compound in compounds:
-                    if len(compound) > 1:  # Skip very short strings
-                        st.markdown("---")
-                        results = fetch_data(compound, match_type, partial_limit)
-                        results["searched_exact"] = match_type in ["Exact", "Both"]
-                        display_compound_results(results, compound, is_multi_search=True)
+                    st.markdown("---")
+                    results = results_by_compound[compound]
+                    results["searched_exact"] = match_type in ["Exact", "Both"]
+                    display_compound_results(results, compound, is_multi_search=True)
             else:
                 st.warning("Could not extract valid compound names from the expression.")
         else: